@@ -1,15 +1,14 @@
+import io
 import os
 import re
-import sys
-import time
 import uuid
-import errno
 import types
-import random
+import bisect
+import codecs
 import typing
 import pathlib
-import warnings
-import collections
+import textwrap
+import functools
 
 try:
     test_error = ModuleNotFoundError()
@@ -26,6 +25,11 @@ except (ModuleNotFoundError, ImportError) as e:
                        "Microscopy Suite program.")
     DM = None
 
+# the DigitalMicrograph functions that are used very often
+_new_tag_group = DM.NewTagGroup
+_new_tag_list = DM.NewTagList
+_get_persistent_tag_group = DM.GetPersistentTagGroup
+
 class DMScriptError(RuntimeError):
     """Error in executed dm-script code."""
     # The doc is shown in the GMS error message. Keeping the real doc string
@@ -79,7 +83,7 @@ class DMScriptError(RuntimeError):
             The error with (most of) the details
         """
 
-        return ("Error in dm-script code {} in line {} (line {} in complete " + 
+        return ("Error in dm-script code {} in line {} (line {} in complete "
                 "code): {}").format(self.script_origin, self.line_in_origin,
                                     self.line_in_complete, self.msg)
 
@@ -118,6 +122,23 @@ _python_dm_type_map = ({
     }
 )
 
+# all names (lowercase) and all python types of the `_python_dm_type_map` 
+# pointing to their type definition for fast lookups, if a key occurres 
+# multiple times, the first type definition is used
+_dm_type_by_key = {}
+for _type_def in _python_dm_type_map:
+    if isinstance(_type_def["python"], (list, tuple)):
+        _keys = list(_type_def["python"])
+    else:
+        _keys = [_type_def["python"]]
+    # the python type to convert to, this is the first one if there are more
+    _type_def["python_primary"] = _keys[0]
+    _keys += [name.lower() for name in _type_def["names"]]
+
+    for _key in _keys:
+        _dm_type_by_key.setdefault(_key, _type_def)
+del _type_def, _keys, _key
+
 Script = typing.Union[str, pathlib.PurePath, typing.Tuple[str, typing.Union[str, pathlib.PurePath]]]
 
 def exec_dmscript(*scripts: Script, 
@@ -227,6 +248,43 @@ def exec_dmscript(*scripts: Script,
                            debug=debug, debug_file=debug_file)
 
 invalid_taggroup_key_characters = (":", "[", "]")
+_invalid_taggroup_key_characters_reg = re.compile("[{}]".format(
+    re.escape("".join(invalid_taggroup_key_characters))
+))
+
+# the `DM.Py_TagGroup` methods to add a value of the type in the key to a 
+# `TagList` or to a `TagGroup`
+_taglist_value_methods = {
+    bool: "InsertTagAsBoolean",
+    int: "InsertTagAsLong",
+    float: "InsertTagAsFloat",
+    str: "InsertTagAsString",
+    type(None): "InsertTagAsShort"
+}
+_taggroup_value_methods = {
+    bool: "SetTagAsBoolean",
+    int: "SetTagAsLong",
+    float: "SetTagAsFloat",
+    str: "SetTagAsString",
+    type(None): "SetTagAsShort"
+}
+def _get_path_error_str(path: typing.Sequence) -> str:
+    """Get the `path` of the `convert_to_taggroup()` recursion as a text to 
+    show in error messages.
+
+    Parameters
+    ----------
+    path : sequence
+        The keys and indices of the parents, the most outer one first
+    
+    Returns
+    -------
+    str
+        The path description, starting with the most inner key
+    """
+    return "".join(map(lambda x: " at dict/list index '{}'".format(x), 
+                       reversed(path)))
+
 def convert_to_taggroup(tags: typing.Union[typing.Dict[str, Convertable], 
                                            typing.List[Convertable], 
                                            typing.Tuple[Convertable, ...]],
@@ -297,81 +355,86 @@ def convert_to_taggroup(tags: typing.Union[typing.Dict[str, Convertable],
         The tag group object
     """
 
-    if isinstance(tags, (list, tuple)):
-        datatype = list
+    is_list = isinstance(tags, (list, tuple))
+    if is_list:
         iterator = enumerate(tags)
-        tag_group = DM.NewTagList()
+        tag_group = _new_tag_list()
+        value_methods = _taglist_value_methods
+        add_tag_group = tag_group.InsertTagAsTagGroup
     else:
-        datatype = dict
         iterator = tags.items()
-        tag_group = DM.NewTagGroup()
+        tag_group = _new_tag_group()
+        value_methods = _taggroup_value_methods
+        add_tag_group = tag_group.SetTagAsTagGroup
     
-    path_str = "".join(map(lambda x: " at dict/list index '{}'".format(x), 
-                           reversed(path)))
+    # the bound methods of the `tag_group` for each value type, they are bound
+    # when they are used for the first time
+    value_setters = {}
     
     if replace_invalid_chars == True:
         replace_invalid_chars = ""
 
     for key, value in iterator:
-        for c in invalid_taggroup_key_characters:
-            if isinstance(key, str) and c in key:
-                if isinstance(replace_invalid_chars, str):
-                    key = key.replace(c, replace_invalid_chars)
-                elif (isinstance(replace_invalid_chars, dict) and 
-                      c in replace_invalid_chars):
-                    key = key.replace(c, str(replace_invalid_chars[c]))
-                elif callable(replace_invalid_chars):
-                    key = replace_invalid_chars(key, c)
-                else:
-                    raise ValueError(("There is a invalid character '{}' in " + 
-                                      "the key '{}'{}.").format(c, key, path_str))
+        # check all characters at once, most keys are valid
+        if (isinstance(key, str) and 
+            _invalid_taggroup_key_characters_reg.search(key) is not None):
+            for c in invalid_taggroup_key_characters:
+                if isinstance(key, str) and c in key:
+                    if isinstance(replace_invalid_chars, str):
+                        key = key.replace(c, replace_invalid_chars)
+                    elif (isinstance(replace_invalid_chars, dict) and 
+                          c in replace_invalid_chars):
+                        key = key.replace(c, str(replace_invalid_chars[c]))
+                    elif callable(replace_invalid_chars):
+                        key = replace_invalid_chars(key, c)
+                    else:
+                        raise ValueError(("There is a invalid character '{}' " + 
+                                          "in the key '{}'{}.").format(
+                                              c, key, 
+                                              _get_path_error_str(path)))
         
-        if isinstance(value, (dict, list, tuple)):
+        value_type = type(value)
+
+        # basic values are the most common, they are found by their exact type
+        if (value_type not in value_methods and 
+            isinstance(value, (dict, list, tuple))):
             value = convert_to_taggroup(value, replace_invalid_chars, (*path, key))
-            if datatype == list:
-                tag_group.InsertTagAsTagGroup(key, value)
-            else:
-                tag_group.SetTagAsTagGroup(key, value)
-        elif isinstance(value, (int, float, bool, str, None)):
+            add_tag_group(key, value)
+        else:
+            if value_type not in value_methods:
+                # subclasses of the supported types, bool is a subclass of int,
+                # so check bool before int
+                for value_type in (bool, int, float, str):
+                    if isinstance(value, value_type):
+                        break
+                else:
+                    raise ValueError(("The type {} of the tag value of {} is " + 
+                                      "not supported. Use int, float, bool, " + 
+                                      "str or None instead.").format(
+                                          type(value), 
+                                          ":".join(map(str, (*path, key)))))
+            
+            setter = value_setters.get(value_type)
+            if setter is None:
+                setter = getattr(tag_group, value_methods[value_type])
+                value_setters[value_type] = setter
+
             try:
-                if isinstance(value, int):
-                    if datatype == list:
-                        tag_group.InsertTagAsLong(key, value)
-                    else:
-                        tag_group.SetTagAsLong(key, value)
-                elif isinstance(value, float):
-                    if datatype == list:
-                        tag_group.InsertTagAsFloat(key, value)
-                    else:
-                        tag_group.SetTagAsFloat(key, value)
-                elif isinstance(value, bool):
-                    if datatype == list:
-                        tag_group.InsertTagAsBoolean(key, value)
-                    else:
-                        tag_group.SetTagAsBoolean(key, value)
-                elif isinstance(value, str):
-                    if datatype == list:
-                        tag_group.InsertTagAsString(key, value)
-                    else:
-                        tag_group.SetTagAsString(key, value)
-                elif value is None:
-                    if datatype == list:
-                        tag_group.InsertTagAsShort(key, 0)
-                    else:
-                        tag_group.SetTagAsShort(key, 0)
+                setter(key, 0 if value is None else value)
             except Exception as e:
                 raise ValueError(("Could not add the value '{}' with key " + 
                                   "'{}'{} to the TagGroup. DigitalMicrograph " + 
                                   "raises an {} with the message '{}'.").format(
-                                      value, key, path_str, 
+                                      value, key, _get_path_error_str(path), 
                                       e.__class__.__name__, str(e))) from e
-        else:
-            raise ValueError(("The type {} of the tag value of {} is not " + 
-                              "supported. Use int, float, bool, str or None " + 
-                              "instead.").format(type(value), ":".join(path)))
         
     return tag_group
 
+# copy the tag group to a local variable to sync that variable back to python
+_convert_from_taggroup_dmscript = "\n".join((
+    "TagGroup {name};",
+    "GetPersistentTagGroup().TagGroupGetTagAsTagGroup(\"{name}\", {name});"
+))
 def convert_from_taggroup(taggroup: DM.Py_TagGroup) -> typing.Union[list, dict]:
     """Convert the given DigitalMicrograph `taggroup` to a dict or list.
 
@@ -396,17 +459,14 @@ def convert_from_taggroup(taggroup: DM.Py_TagGroup) -> typing.Union[list, dict]:
     """
 
     tg_type = list if taggroup.IsList() else dict
-    tg_name = "convert_tg_{}".format(int(time.time() * 100))
+    tg_name = unique_tag("convert_tg")
 
     # save tag group to persistent tags to pass them to dm-script
-    DM.GetPersistentTagGroup().SetTagAsTagGroup(tg_name, taggroup)
+    _get_persistent_tag_group().SetTagAsTagGroup(tg_name, taggroup)
 
     # copy the tag group to a local variable to sync that variable back to 
     # python
-    dm_code = "\n".join((
-        "TagGroup {};".format(tg_name),
-        "GetPersistentTagGroup().TagGroupGetTagAsTagGroup(\"{}\", {});".format(tg_name, tg_name)
-    ))
+    dm_code = _convert_from_taggroup_dmscript.format(name=tg_name)
     
     with exec_dmscript(dm_code, readvars={tg_name: tg_type}) as script:
         remove_global_tag(tg_name)
@@ -417,6 +477,33 @@ def convert_from_taggroup(taggroup: DM.Py_TagGroup) -> typing.Union[list, dict]:
          "that was used to convert a TagGroup to a dict or list.").format(tg_name)
     )
 
+def _find_type_def(datatype: typing.Union[str, type]) -> typing.Optional[dict]:
+    """Get the type definition of the `_python_dm_type_map` for the given
+    `datatype`.
+
+    Parameters
+    ----------
+    datatype : str or type
+        The type to get the definition of, python types and common type 
+        expressions are supported
+    
+    Returns
+    -------
+    dict or None
+        The type definition or None if the `datatype` is not known
+    """
+
+    global _dm_type_by_key
+
+    if isinstance(datatype, str):
+        datatype = datatype.lower()
+    
+    try:
+        return _dm_type_by_key.get(datatype)
+    except TypeError:
+        # unhashable objects cannot be a type
+        return None
+
 def get_dm_type(datatype: typing.Union[str, type], 
                 for_taggroup: typing.Optional[bool]=False):
     """Get the dm-script equivalent for the given `datatype`.
@@ -444,22 +531,14 @@ def get_dm_type(datatype: typing.Union[str, type],
         The datatype name in dm-script
     """
 
-    global _python_dm_type_map
-
-    if isinstance(datatype, str):
-        datatype = datatype.lower()
-    
-    for type_def in _python_dm_type_map:
-        names = list(map(lambda x: x.lower() if isinstance(x, str) else x, 
-                         type_def["names"]))
-        if datatype in names or (isinstance(type_def["python"], (list, tuple)) and
-           datatype in type_def["python"]) or datatype == type_def["python"]:
-            if for_taggroup:
-                return type_def["TagGroup"]
-            else:
-                return type_def["dmscript"]
+    type_def = _find_type_def(datatype)
     
-    raise LookupError("Cannot find the dm-script type for '{}'".format(datatype))
+    if type_def is None:
+        raise LookupError("Cannot find the dm-script type for '{}'".format(datatype))
+    elif for_taggroup:
+        return type_def["TagGroup"]
+    else:
+        return type_def["dmscript"]
 
 def get_python_type(datatype: typing.Union[str, type]):
     """Get the python equivalent for the given `datatype`.
@@ -484,22 +563,12 @@ def get_python_type(datatype: typing.Union[str, type]):
         The datatype name in python
     """
 
-    global _python_dm_type_map
-
-    if isinstance(datatype, str):
-        datatype = datatype.lower()
+    type_def = _find_type_def(datatype)
     
-    for type_def in _python_dm_type_map:
-        names = list(map(lambda x: x.lower() if isinstance(x, str) else x, 
-                         type_def["names"]))
-        if datatype in names or (isinstance(type_def["python"], (list, tuple)) and
-           datatype in type_def["python"]) or datatype == type_def["python"]:
-            if isinstance(type_def["python"], (list, tuple)):
-                return type_def["python"][0]
-            else:
-                return type_def["python"]
-    
-    raise LookupError("Cannot find the python type for '{}'".format(datatype))
+    if type_def is None:
+        raise LookupError("Cannot find the python type for '{}'".format(datatype))
+    else:
+        return type_def["python_primary"]
 
 _replace_dm_variable_name_reg = re.compile(r"[^\w\d_]")
 def escape_dm_variable(variable_name: str):
@@ -524,7 +593,7 @@ def escape_dm_variable(variable_name: str):
 
     global _replace_dm_variable_name_reg
 
-    name = re.sub(_replace_dm_variable_name_reg, "_", str(variable_name))
+    name = _replace_dm_variable_name_reg.sub("_", str(variable_name))
 
     if name == "":
         raise ValueError(("The variable name '{}' is not a valid (dm-script) " + 
@@ -532,6 +601,13 @@ def escape_dm_variable(variable_name: str):
     
     return name
 
+_dm_string_escape_table = str.maketrans({
+    "\\": "\\\\",
+    "\"": "\\\"",
+    "\n": "\\n",
+    "\t": "\\t",
+    "\0": "\\0"
+})
 def escape_dm_string(str_content: str):
     """Escape all special characters so the `str_content` can safely be used 
     in dm-script strings.
@@ -547,12 +623,9 @@ def escape_dm_string(str_content: str):
         The str with additional escape characters
     """
 
-    return (str(str_content)
-            .replace("\\", "\\\\")
-            .replace("\"", "\\\"")
-            .replace("\n", "\\n")
-            .replace("\t", "\\t")
-            .replace("\0", "\\0"))
+    global _dm_string_escape_table
+
+    return str(str_content).translate(_dm_string_escape_table)
 
 def remove_global_tag(*tagname: str) -> None:
     """Remove the global tag with the given `tagname`.
@@ -565,8 +638,25 @@ def remove_global_tag(*tagname: str) -> None:
 
     if DM is not None:
         for tgn in tagname:
-            DM.GetPersistentTagGroup().DeleteTagWithLabel(tgn)
-
+            # do not save the persistent tags to a variable, they do not work
+            # anymore then
+            _get_persistent_tag_group().DeleteTagWithLabel(tgn)
+
+# the `path` and the `value_tagname` are passed as setvars
+_get_persistent_tag_dmscript = "\n".join((
+    "number exists = GetPersistentTagGroup().TagGroupDoesTagExist(path);",
+    "TagGroup value_taggroup = NewTagGroup();",
+    "",
+    "if(exists){",
+        "TagGroup source;",
+        "string source_label;",
+        "number source_index = GetPersistentTagGroup().TagGroupParseTagPath(path, source, source_label);",
+        "",
+        "number target_index = value_taggroup.TagGroupCreateNewLabeledTag(value_tagname);",
+        "value_taggroup.TagGroupCopyTagToIndex(target_index, source, source_index);",
+        # "value_taggroup.TagGroupOpenBrowserWindow(0);"
+    "}"
+))
 def get_persistent_tag(path: typing.Optional[typing.Union[typing.Sequence[str], str, None]]=None) -> typing.Union[Convertable, typing.Dict[str, Convertable], typing.List[Convertable]]:
     """Get the value of a persistent tag.
 
@@ -604,9 +694,7 @@ def get_persistent_tag(path: typing.Optional[typing.Union[typing.Sequence[str],
     if path is not None and not isinstance(path, str):
         path = ":".join(path)
     
-    id_ = int(time.time() * 100)
-    
-    value_tagname = "value_tag_{}".format(id_)
+    value_tagname = unique_tag("value_tag")
     setvars = {
         "path": path,
         "value_tagname": value_tagname
@@ -615,22 +703,7 @@ def get_persistent_tag(path: typing.Optional[typing.Union[typing.Sequence[str],
         "value_taggroup": dict,
         "exists": bool
     }
-    dmscript = "\n".join((
-        "number exists = GetPersistentTagGroup().TagGroupDoesTagExist(path);",
-        "TagGroup value_taggroup = NewTagGroup();",
-        "",
-        "if(exists){",
-            "TagGroup source;",
-            "string source_label;",
-            "number source_index = GetPersistentTagGroup().TagGroupParseTagPath(path, source, source_label);",
-            "",
-            "number target_index = value_taggroup.TagGroupCreateNewLabeledTag(value_tagname);",
-            "value_taggroup.TagGroupCopyTagToIndex(target_index, source, source_index);",
-            # "value_taggroup.TagGroupOpenBrowserWindow(0);"
-        "}"
-    ))
-
-    with exec_dmscript(dmscript, readvars=readvars, setvars=setvars) as script:
+    with exec_dmscript(_get_persistent_tag_dmscript, readvars=readvars, setvars=setvars) as script:
         if script["exists"] and value_tagname in script["value_taggroup"]:
             return script["value_taggroup"][value_tagname]
     
@@ -652,6 +725,293 @@ def unique_tag(tagname: str) -> str:
     """
     return "{}_{}".format(tagname, str(uuid.uuid4()).replace("-", "_"))
 
+@functools.lru_cache(maxsize=32)
+def _read_cached_script_file(path: str, mtime_ns: int, size: int) -> str:
+    """Get the content of the file at the `path`.
+
+    The `mtime_ns` and the `size` are not used but they are part of the cache
+    key, so a modified file is read again.
+
+    Parameters
+    ----------
+    path : str
+        The file path
+    mtime_ns : int
+        The modification time of the file in nanoseconds
+    size : int
+        The file size in bytes
+    
+    Returns
+    -------
+    str
+        The file content
+    """
+    with open(path, "r") as f:
+        return f.read()
+
+def _read_script_file(path: typing.Union[str, pathlib.PurePath]) -> str:
+    """Get the content of the dm-script file at the `path`.
+
+    Files are only read again if they are modified, so executing the same 
+    file multiple times does not read it from the disk each time.
+
+    Parameters
+    ----------
+    path : str or pathlib.PurePath
+        The file path
+    
+    Returns
+    -------
+    str
+        The file content
+    """
+    stat = os.stat(str(path))
+    return _read_cached_script_file(str(path), stat.st_mtime_ns, stat.st_size)
+
+_slash_split_reg = re.compile("(?<!/)/(?!/)")
+_dm_error_reg = re.compile(r"Error in line ([\d]+)\s*\n(.*)", re.DOTALL)
+
+# the dm-script type and the function to create the dm-script value of each 
+# python type that can be inserted in a `TagGroup` or `TagList` directly, 
+# `None` is expressed as the number 0
+_taggroup_value_dm_code = {
+    bool: (get_dm_type(bool, for_taggroup=True), int),
+    int: (get_dm_type(int, for_taggroup=True), str),
+    float: (get_dm_type(float, for_taggroup=True), str),
+    str: (get_dm_type(str, for_taggroup=True), 
+          lambda v: "\"{}\"".format(escape_dm_string(v))),
+    type(None): ("Number", lambda v: 0)
+}
+
+# the dm-script code of the functions that are used by the synchronizing
+# code, this does not depend on the executed code
+_execdmscript_lib_functions = textwrap.dedent(
+        """
+        string __exec_dmscript_escape_non_ascii(string str){
+            string escaped = "";
+            number l = str.len();
+            number u = 0;
+            // the index of the first character that is not added yet
+            number start = 0;
+            for(number i = 0; i < l; i++){
+                u = unc(str, i);
+                if(u > 126){
+                    // current character is a non-ascii character
+                    escaped.stringAppend(str.mid(start, i - start));
+                    escaped.stringAppend("{{unc" + u + "}}");
+                    start = i + 1;
+                }
+            }
+
+            if(start == 0){
+                // there are only ascii characters
+                return str;
+            }
+
+            escaped.stringAppend(str.right(l - start));
+            return escaped;
+        }
+
+        string __exec_dmscript_replace(string subject, string search, string replace){
+            String r = "";
+            number l = search.len();
+            number pos = subject.find(search);
+            while(pos >= 0){
+                r.stringAppend(subject.left(pos));
+                r.stringAppend(replace);
+                // find() cannot start at an offset, continue with the rest
+                subject = subject.right(subject.len() - pos - l);
+                pos = subject.find(search);
+            }
+            // the part after the last occurrence
+            r.stringAppend(subject);
+
+            return r;
+        }
+
+        void __exec_dmscript_linearizeTagsRecursive(TagGroup &linearized, TagGroup tg, string path, string &available_paths){
+            // the path has to be escaped already, the labels added here are
+            // escaped before they are passed to the recursive calls
+            if(tg.TagGroupIsValid()){
+                number is_list = tg.TagGroupIsList();
+                string path_slash = path + "/";
+                number count = tg.TagGroupCountTags();
+                for(number i = 0; i < count; i++){
+                    String label;
+                    if(is_list){
+                        // the index never contains non-ascii characters
+                        label = i + "";
+                    }
+                    else{
+                        label = tg.TagGroupGetTagLabel(i).__exec_dmscript_replace("/", "//");
+                        label = __exec_dmscript_escape_non_ascii(label);
+                    }
+
+                    number type = tg.TagGroupGetTagType(i, 0);
+                    string type_name = "";
+                    number index;
+                    string p = path_slash + label;
+
+                    if(type == 0 || type == 3){
+                        // TagGroup
+                        // There is a bug where TagGroups return 3 instead of 0,
+                        // this can simply be tested by converting to a
+                        // TagGroup, if the TagGroup is not valid, it is a long,
+                        // otherwise the TagGroup
+                        TagGroup value;
+                        tg.TagGroupGetIndexedTagAsTagGroup(i, value);
+
+                        if(type == 0 || value.TagGroupIsValid()){
+                            // adds the paths of the children to the 
+                            // available_paths
+                            __exec_dmscript_linearizeTagsRecursive(linearized, value, p, available_paths);
+                            
+                            if(value.TagGroupIsList()){
+                                type_name = "TagList";
+                            }
+                            else{
+                                type_name = "TagGroup";
+                            }
+                        }
+                    }
+
+                    if(type_name == ""){
+                        if(type == 2){
+                            // tag is a short
+                            number value
+
+                            tg.TagGroupGetIndexedTagAsShort(i, value)
+                            index = linearized.TagGroupCreateNewLabeledTag(p);
+                            linearized.TagGroupSetIndexedTagAsShort(index, value);
+                            type_name = "Short";
+                        }
+                        else if(type == 3){
+                            // tag is a long
+                            number value
+
+                            tg.TagGroupGetIndexedTagAsLong(i, value)
+                            index = linearized.TagGroupCreateNewLabeledTag(p);
+                            linearized.TagGroupSetIndexedTagAsLong(index, value);
+                            type_name = "Long";
+                        }
+                        else if(type == 4){
+                            number value;
+                            
+                            tg.TagGroupGetIndexedTagAsUInt16(i, value);
+                            index = linearized.TagGroupCreateNewLabeledTag(p);
+                            linearized.TagGroupSetIndexedTagAsUInt16(index, value);
+                            type_name = "UInt16";
+                        }
+                        else if(type == 5){
+                            number value;
+                            
+                            tg.TagGroupGetIndexedTagAsUInt32(i, value);
+                            index = linearized.TagGroupCreateNewLabeledTag(p);
+                            linearized.TagGroupSetIndexedTagAsUInt32(index, value);
+                            type_name = "UInt32";
+                        }
+                        else if(type == 6){
+                            // tag is a float
+                            number value
+
+                            tg.TagGroupGetIndexedTagAsFloat(i, value)
+                            index = linearized.TagGroupCreateNewLabeledTag(p);
+                            linearized.TagGroupSetIndexedTagAsFloat(index, value);
+                            type_name = "Float";
+                        }
+                        else if(type == 7){
+                            // tag is a double
+                            number value
+
+                            tg.TagGroupGetIndexedTagAsDouble(i, value)
+                            index = linearized.TagGroupCreateNewLabeledTag(p);
+                            linearized.TagGroupSetIndexedTagAsDouble(index, value);
+                            type_name = "Double";
+                        }
+                        else if(type == 8){
+                            // tag is a boolean
+                            number value
+
+                            tg.TagGroupGetIndexedTagAsBoolean(i, value)
+                            index = linearized.TagGroupCreateNewLabeledTag(p);
+                            linearized.TagGroupSetIndexedTagAsBoolean(index, value);
+                            type_name = "Boolean";
+                        }
+                        // skip type=15, this is more complicated types like rgbnumber, 
+                        // shortpoint, longpoint, floatcomplex, doublecomplex, and
+                        // shortrect, longrect and float rect
+                        else if(type == 20){
+                            // tag is a string
+                            string value
+
+                            tg.TagGroupGetIndexedTagAsString(i, value)
+                            index = linearized.TagGroupCreateNewLabeledTag(p);
+                            linearized.TagGroupSetIndexedTagAsString(index, __exec_dmscript_escape_non_ascii(value));
+                            type_name = "String";
+                        }
+                    }
+                    
+                    if(type_name != ""){
+                        index = linearized.TagGroupCreateNewLabeledTag("{{type}}" + p);
+                        linearized.TagGroupSetIndexedTagAsString(index, type_name);
+
+                        available_paths.stringAppend(p);
+                        available_paths.stringAppend(";");
+                    }
+                }
+            }
+        }
+
+        void __exec_dmscript_linearizeTags(TagGroup &linearized, TagGroup tg, string var_name, string path){
+            if(!tg.TagGroupIsValid()){
+                return;
+            }
+
+            string available_paths = "";
+            string ap_key = "{{available-paths}}" + var_name;
+            number have_ap = linearized.TagGroupDoesTagExist(ap_key);
+            if(have_ap){
+                linearized.TagGroupGetTagAsString(ap_key, available_paths);
+            }
+
+            // collect all paths and save them once
+            __exec_dmscript_linearizeTagsRecursive(linearized, tg, path, available_paths);
+
+            if(!have_ap){
+                number ind = linearized.TagGroupCreateNewLabeledTag(ap_key);
+                linearized.TagGroupSetIndexedTagAsString(ind, available_paths);
+            }
+            else{
+                linearized.TagGroupSetTagAsString(ap_key, available_paths);
+            }
+        }
+        """)
+
+class _ScriptSource:
+    """The position of a part of the executed code in the complete code."""
+
+    __slots__ = ("start", "end", "origin_name", "origin_detail")
+
+    def __init__(self, start: int, end: int, origin_name: str, 
+                 origin_detail: typing.Any) -> None:
+        """
+        Parameters
+        ----------
+        start : int
+            The first line of the code in the complete code
+        end : int
+            The last line of the code in the complete code
+        origin_name : str
+            The name of the origin to show to the user
+        origin_detail : any
+            The details of the origin, the file path, the script or the 
+            function that created the code
+        """
+        self.start = start
+        self.end = end
+        self.origin_name = origin_name
+        self.origin_detail = origin_detail
+
 class DMScriptWrapper:
     """Wraps one or more dm-scripts.
     """
@@ -664,6 +1024,38 @@ class DMScriptWrapper:
     debug_start_marker = "@execdmscript.ignore.start"
     debug_end_marker = "@execdmscript.ignore.end"
 
+    # all lines from the line containing the start marker to the line 
+    # containing the end marker (or to the end of the code), if the start line
+    # contains the end marker too, only this line is matched
+    _debug_lines_reg = re.compile(
+        r"^(?=[^\n]*{start})(?:[^\n]*{end}[^\n]*|.*?{end}[^\n]*|.*)".format(
+            start=re.escape(debug_start_marker), 
+            end=re.escape(debug_end_marker)
+        ), 
+        re.DOTALL | re.MULTILINE
+    )
+    _line_start_reg = re.compile(r"^", re.MULTILINE)
+
+    # the code to surround code executed in a separate thread with, the `id` 
+    # is the unique id of the wrapper, the `i` is the thread index
+    _separate_thread_start_code = "\n".join((
+        "object thread_cancel_signal{id}_{i} = NewCancelSignal();",
+        "object thread_done_signal{id}_{i} = NewSignal(0);",
+        "class ExecDMScriptThread{id}_{i} : Thread{{",
+        "void RunThread(object self){{"
+    ))
+    _separate_thread_end_code = "\n".join((
+        "// inform that the thread is done now",
+        "thread_done_signal{id}_{i}.setSignal();",
+        "}}", # end ExecDMScriptThread<id>::RunThread()
+        "}}", # end ExecDMScriptThread<id> class
+        "alloc(ExecDMScriptThread{id}_{i}).StartThread();"
+    ))
+    _separate_thread_wait_code = "\n".join((
+        "// wait for the thread {i}",
+        "thread_done_signal{id}_{i}.WaitOnSignal(infinity(), thread_cancel_signal{id}_{i});"
+    ))
+
     def __init__(self,
                  *scripts: Script, 
                  readvars: typing.Optional[dict]=None,
@@ -717,18 +1109,22 @@ class DMScriptWrapper:
         
         self.debug = bool(debug)
         self.debug_file = debug_file
-        self._slash_split_reg = re.compile("(?<!/)/(?!/)")
         self._script_sources = []
+        # the start lines of the `_script_sources` in the same order for 
+        # searching the source of a line
+        self._script_starts = []
 
         # add all setvars to the readvars to allow accessing them after the 
         # script is executed
         if isinstance(self.setvars, dict):
-            if not isinstance(self.readvars, dict):
+            if isinstance(self.readvars, dict):
+                # copy once, otherwise the dict given by the user is modified
+                self.readvars = self.readvars.copy()
+            else:
                 self.readvars = {}
             
             for key, val in self.setvars.items():
-                if not key in self.readvars:
-                    self.readvars[key] = type(val)
+                self.readvars.setdefault(key, type(val))
     
     def __del__(self) -> None:
         """Desctruct the object."""
@@ -745,30 +1141,31 @@ class DMScriptWrapper:
         
         dmscript = self.getExecDMScriptCode()
         
-        if hasattr(self.debug_file, "write") and callable(self.debug_file.write):
-            debug_file = self.debug_file
-            close_debug_file = False
-            debug_file_name = repr(debug_file)
-        else:
-            if isinstance(self.debug_file, (str, pathlib.PurePath)):
-                path = self.debug_file
-            else:
-                path = os.path.join(os.getcwd(), "tmp-execdmscript.s")
-            
-            try:
-                debug_file = open(path, "w+")
-                # opened the file so close it after writing
-                close_debug_file = True
-                debug_file_name = path
-            except Exception:
-                debug_file = None
+        debug_file = None
+        if self.debug:
+            if (hasattr(self.debug_file, "write") and 
+                callable(self.debug_file.write)):
+                debug_file = self.debug_file
                 close_debug_file = False
-                debug_file_name = None
+                debug_file_name = repr(debug_file)
+            else:
+                # the path is only needed in debug mode, so resolve it here
+                if isinstance(self.debug_file, (str, pathlib.PurePath)):
+                    path = self.debug_file
+                else:
+                    path = os.path.join(os.getcwd(), "tmp-execdmscript.s")
+                
+                try:
+                    debug_file = open(path, "w+")
+                    # opened the file so close it after writing
+                    close_debug_file = True
+                    debug_file_name = path
+                except Exception:
+                    debug_file = None
         
-        if self.debug and debug_file is not None:
+        if debug_file is not None:
             debug_file.write(dmscript)
-            if (close_debug_file and hasattr(debug_file, "close") and 
-                callable(debug_file.close)):
+            if close_debug_file:
                 debug_file.close()
             print(("execdmscript: Did not execute script but saved to {} " + 
                     "because file is running in debug mode.").format(debug_file_name))
@@ -777,7 +1174,7 @@ class DMScriptWrapper:
             try:
                 DM.ExecuteScriptString(dmscript)
             except RuntimeError as e:
-                matches = re.match(r"Error in line ([\d]+)\s*\n(.*)", str(e))
+                matches = _dm_error_reg.match(str(e))
 
                 if matches is not None:
                     # there is an error in the executed script, read the line
@@ -787,22 +1184,26 @@ class DMScriptWrapper:
                     # and suffixed
                     line = int(matches.group(1))
 
-                    for script_src in self._script_sources:
-                        if (script_src["start"] <= line and 
-                            line <= script_src["end"]):
-                            msg = matches.group(2)
-                            src = script_src["origin-name"]
-                            l = line - script_src["start"] + 1
+                    # the sources are sorted and do not overlap, so the source
+                    # is the last one that starts before the line
+                    index = bisect.bisect_right(self._script_starts, line) - 1
 
-                            error = DMScriptError(msg, src, l, line)
-                            
-                            # GMS shows the docstring in their error message,
-                            # so to offer a useful text, overwrite the docstring
-                            error.__doc__ = str(error)
-                            type(error).__doc__ = str(error)
-                            DMScriptError.__doc__ = str(error)
+                    if index >= 0 and line <= self._script_sources[index].end:
+                        script_src = self._script_sources[index]
+                        msg = matches.group(2)
+                        src = script_src.origin_name
+                        l = line - script_src.start + 1
 
-                            raise error from e
+                        error = DMScriptError(msg, src, l, line)
+                        
+                        # GMS shows the docstring in their error message,
+                        # so to offer a useful text, overwrite the docstring,
+                        # type(error) is DMScriptError
+                        error_str = str(error)
+                        error.__doc__ = error_str
+                        DMScriptError.__doc__ = error_str
+
+                        raise error from e
                 else:
                     raise e
             self._loadVariablesFromDMScript()
@@ -860,6 +1261,7 @@ class DMScriptWrapper:
             The code to execute
         """
         self._script_sources = []
+        self._script_starts = []
         dmscript = []
         startpos = 1
 
@@ -885,15 +1287,11 @@ class DMScriptWrapper:
         # add the real code to execute
         dm_file_added = False
         for i, (kind, script) in enumerate(self.scripts):
-            if isinstance(kind, str):
-                kind = kind.lower()
-
             if kind == "file":
                 source = script
                 dm__file__ = script
                 comment = "// File {}".format(escape_dm_string(source))
-                with open(script, "r") as f:
-                    code = f.read()
+                code = _read_script_file(script)
             elif kind == "script":
                 source = "<inline script in parameter {}>".format(i)
                 comment = "// Directly given script"
@@ -919,7 +1317,7 @@ class DMScriptWrapper:
 
         wait_for_signals = []
         # execute in a separate thread
-        if isinstance(self.separate_thread, collections.Sequence):
+        if isinstance(self.separate_thread, (list, tuple)):
             for i, (kind, script) in enumerate(DMScriptWrapper.normalizeScripts(self.separate_thread)):
                 wait_for_signals.append(i)
 
@@ -929,20 +1327,14 @@ class DMScriptWrapper:
                     self.getSeparateThreadStartCode, startpos
                 )
 
-                if isinstance(kind, str):
-                    kind = kind.lower()
-
                 if kind == "file":
                     source = script
                     comment = "// File {}".format(escape_dm_string(source))
-                    with open(script, "r") as f:
-                        code = f.read()
+                    code = _read_script_file(script)
                 elif kind == "script":
                     source = "<separate_thread parameter {}>".format(i)
                     comment = "// Directly given script"
                     code = script
-                
-                code = code.encode("iso-8859-1")
 
                 dmscript, startpos = self._addCode(
                     dmscript, comment, "<comments>", None, startpos
@@ -1020,7 +1412,7 @@ class DMScriptWrapper:
         # the number of lines (minus one)
         code_lines = 0
         if isinstance(code, (list, tuple)):
-            code_lines = sum([c.count("\n") for c in code]) + len(code) - 1
+            code_lines = sum(c.count("\n") for c in code) + len(code) - 1
             code = "\n".join(code)
         elif isinstance(code, str):
             code_lines = code.count("\n")
@@ -1029,29 +1421,20 @@ class DMScriptWrapper:
                               "nor a string but a '{}' which is not " + 
                               "supported").format(type(code)))
 
-        if remove_debug_lines:
-            comment_lines = False
-            lines = code.split("\n")
-            for i, line in enumerate(lines):
-                if DMScriptWrapper.debug_start_marker in line:
-                    comment_lines = True
-                
-                if comment_lines:
-                    lines[i] = "// " + line
-                
-                if DMScriptWrapper.debug_end_marker in line:
-                    comment_lines = False
-            
-            code = "\n".join(lines)
+        # most code does not contain the markers, a substring test is cheaper
+        # than the regular expression, so only run it if there is a marker
+        if remove_debug_lines and DMScriptWrapper.debug_start_marker in code:
+            code = DMScriptWrapper._debug_lines_reg.sub(
+                lambda m: DMScriptWrapper._line_start_reg.sub("// ", m.group(0)),
+                code
+            )
 
         dmscript.append(code)
 
-        self._script_sources.append({
-            "start": startpos, 
-            "end": startpos + code_lines,
-            "origin-name": origin_name,
-            "origin-detail": origin_detail
-        })
+        self._script_starts.append(startpos)
+        self._script_sources.append(_ScriptSource(
+            startpos, startpos + code_lines, origin_name, origin_detail
+        ))
         
         return dmscript, startpos + code_lines + 1
     
@@ -1075,12 +1458,9 @@ class DMScriptWrapper:
             The code to append to the dm-script code
         """
 
-        return "\n".join((
-            "object thread_cancel_signal{}_{} = NewCancelSignal();".format(self._unique_id, index),
-            "object thread_done_signal{}_{} = NewSignal(0);".format(self._unique_id, index),
-            "class ExecDMScriptThread{}_{} : Thread{{".format(self._unique_id, index),
-            "void RunThread(object self){"
-        ))
+        return DMScriptWrapper._separate_thread_start_code.format(
+            id=self._unique_id, i=index
+        )
     
     def getSeparateThreadEndCode(self, index: int) -> str:
         """Get the dm-script code for executing the complete script in a 
@@ -1102,15 +1482,9 @@ class DMScriptWrapper:
             The code to append to the dm-script code
         """
 
-        return "\n".join((
-            "// inform that the thread is done now",
-            "thread_done_signal{}_{}.setSignal();".format(self._unique_id, index),
-            "}", # end ExecDMScriptThread<id>::RunThread()
-            "}", # end ExecDMScriptThread<id> class
-            "alloc(ExecDMScriptThread{}_{}).StartThread();".format(
-                self._unique_id, index
-            )
-        ))
+        return DMScriptWrapper._separate_thread_end_code.format(
+            id=self._unique_id, i=index
+        )
     
     def getSeparateThreadWaitCode(self, index: int) -> str:
         """Get the dm-script code for waiting to complete all separately 
@@ -1127,12 +1501,9 @@ class DMScriptWrapper:
             The code to append to the dm-script code
         """
 
-        return "\n".join((
-            "// wait for the thread {}".format(index),
-            "thread_done_signal{id}_{i}.WaitOnSignal(infinity(), thread_cancel_signal{id}_{i});".format(
-                id=self._unique_id, i=index
-            )
-        ))
+        return DMScriptWrapper._separate_thread_wait_code.format(
+            id=self._unique_id, i=index
+        )
     
     def getSetVarsDMCode(self) -> str:
         """Get the dm-script code for defining the `setvars`.
@@ -1146,13 +1517,13 @@ class DMScriptWrapper:
         if not isinstance(self.setvars, dict):
             return ""
 
-        dmscript = [
-            "// Setting variables from python values"
-        ]
+        dmscript = io.StringIO()
+        dmscript.write("// Setting variables from python values")
         for name, val in self.setvars.items():
-            dmscript.append(DMScriptWrapper.getDMCodeForVariable(name, val))
+            dmscript.write("\n")
+            dmscript.write(DMScriptWrapper.getDMCodeForVariable(name, val))
         
-        return "\n".join(dmscript)
+        return dmscript.getvalue()
 
     def getSyncDMCode(self) -> str:
         """Get the `dm-script` code that has to be added to the executed code 
@@ -1166,7 +1537,7 @@ class DMScriptWrapper:
         if not isinstance(self.readvars, dict) or len(self.readvars) == 0:
             return ""
         
-        dmscript = []
+        dmscript = io.StringIO()
         
         # the name of the tag group to use
         sync_code_tg_name = "sync_taggroup_" + self._unique_id
@@ -1188,32 +1559,38 @@ class DMScriptWrapper:
             "{tg}_index = {tg}_tg.TagGroupCreateNewLabeledTag(\"{{key}}\");",
             "{tg}_tg.TagGroupSetIndexedTagAs{{type}}({tg}_index, {{val}});"
         )).format(tg=sync_code_tg_name, pt=self.persistent_tag)
+
+        # the template to use for each TagGroup or TagList
+        linearize_template = (
+            "__exec_dmscript_linearizeTags({tg}_tg, {{var}}, \"{{key}}\", " + 
+            "__exec_dmscript_escape_non_ascii(\"{{key}}\"));"
+        ).format(tg=sync_code_tg_name)
         
-        dmscript.append(sync_code_prefix.format(
+        dmscript.write(sync_code_prefix.format(
             tg=sync_code_tg_name, pt=self.persistent_tag
         ))
 
         for var_name, var_type in self.readvars.items():
             py_type = get_python_type(var_type)
+            key = escape_dm_string(var_name)
 
+            # separate from the previous code
+            dmscript.write("\n")
             if py_type in (dict, list, tuple):
-                dmscript.append(
-                    "__exec_dmscript_linearizeTags({tg}_tg, {var_name}, \"{key}\", \"{key}\");".format(
-                        var_name=escape_dm_variable(var_name),
-                        key=escape_dm_string(var_name), 
-                        tg=sync_code_tg_name
+                dmscript.write(linearize_template.format(
+                    var=escape_dm_variable(var_name), key=key
                 ))
             else:
                 val = escape_dm_variable(var_name)
                 if py_type == str:
                     val = "__exec_dmscript_escape_non_ascii({})".format(val)
                     
-                dmscript.append(sync_code_template.format(
-                    key=escape_dm_string(var_name), val=val, 
+                dmscript.write(sync_code_template.format(
+                    key=key, val=val, 
                     type=get_dm_type(var_type, for_taggroup=True)
                 ))
         
-        return "\n".join(dmscript)
+        return dmscript.getvalue()
     
     def _loadVariablesFromDMScript(self) -> None:
         """Load the variables from the persistent tags to dm-script."""
@@ -1226,7 +1603,6 @@ class DMScriptWrapper:
         for var_name, var_type in self.readvars.items():
             path = self.persistent_tag + ":" + var_name
             
-            var_type = self.readvars[var_name]
             py_type = get_python_type(var_type)
             
             if py_type in (dict, list, tuple):
@@ -1235,17 +1611,20 @@ class DMScriptWrapper:
                 # get the paths of all elements added to this group, recursive
                 # travelling is not possible because TagGroups cannot be saved
                 # to variables
-                success, tg_keys = (DM.GetPersistentTagGroup().
-                                    GetTagAsString(
-                                        self.persistent_tag + ":{{available-paths}}" + str(var_name)
-                                    ))
+                success, tg_keys = _get_persistent_tag_group().GetTagAsString(
+                    self.persistent_tag + ":{{available-paths}}" + str(var_name)
+                )
 
                 if success:
-                    tg_keys = list(filter(lambda x: x != "", tg_keys.split(";")))
+                    tg_keys = [k for k in tg_keys.split(";") if k != ""]
+                    # the available paths contain every parent path again 
+                    # for each of its children, ask dm-script for the type 
+                    # of each path only once
+                    path_types = {}
                     
                     for tg_key in tg_keys:
-                        paths = list(filter(lambda x: x != "", 
-                                            self._slash_split_reg.split(tg_key)))
+                        paths = [p for p in _slash_split_reg.split(tg_key) 
+                                 if p != ""]
                         
                         for i, path in enumerate(paths):
                             # build the value structure
@@ -1273,11 +1652,13 @@ class DMScriptWrapper:
                                         # key already exists and is None
                                         # append was wrong
                                         value_ref.append(None)
+                                    child = value_ref[key]
                                 elif cur_type == "TagGroup":
+                                    # slashes in the labels are escaped by 
+                                    # doubling them
                                     key = DMScriptWrapper.unescapeNonAscii(
-                                            str(path))
-                                    if key not in value_ref:
-                                        value_ref[key] = None
+                                            str(path)).replace("//", "/")
+                                    child = value_ref.setdefault(key, None)
                                 else:
                                     break
                                 
@@ -1286,26 +1667,34 @@ class DMScriptWrapper:
                                 cur_path = "/".join(map(str, paths[0:(i + 1)]))
                                 
                                 # get the current datatype
-                                s, cur_type = (DM.GetPersistentTagGroup().
+                                if cur_path in path_types:
+                                    cur_type = path_types[cur_path]
+                                else:
+                                    # do not save the persistent tags to a 
+                                    # variable, they do not work anymore then
+                                    s, cur_type = (_get_persistent_tag_group().
                                         GetTagAsString(
                                             self.persistent_tag + 
                                             ":{{type}}" + str(cur_path)
                                         ))
+                                    path_types[cur_path] = cur_type
                                 
                                 if cur_type == "TagGroup":
                                     # create a new dict and save it in 
-                                    # the current key, then set the
-                                    # reference to this new dict
-                                    if not isinstance(value_ref[key], dict):
-                                        value_ref[key] = {}
-                                    value_ref = value_ref[key]
+                                    # the current key (if there is none yet),
+                                    # then set the reference to this dict
+                                    if not isinstance(child, dict):
+                                        child = {}
+                                        value_ref[key] = child
+                                    value_ref = child
                                 elif cur_type == "TagList":
                                     # create a new list, add as many times
                                     # None as necessary to reach the
                                     # current index
-                                    if not isinstance(value_ref[key], list):
-                                        value_ref[key] = []
-                                    value_ref = value_ref[key]
+                                    if not isinstance(child, list):
+                                        child = []
+                                        value_ref[key] = child
+                                    value_ref = child
                                 else:
                                     # the current type is a real value, 
                                     # get the parsed value and stop (there 
@@ -1355,13 +1744,13 @@ class DMScriptWrapper:
         # do not save the persistent tags to a variable, this way they do 
         # not work anymore (for any reason)
         if dm_type == "Long":
-            success, value = DM.GetPersistentTagGroup().GetTagAsLong(path)
+            success, value = _get_persistent_tag_group().GetTagAsLong(path)
         elif dm_type == "Float":
-            success, value = DM.GetPersistentTagGroup().GetTagAsFloat(path)
+            success, value = _get_persistent_tag_group().GetTagAsFloat(path)
         elif dm_type == "Boolean":
-            success, value = DM.GetPersistentTagGroup().GetTagAsBoolean(path)
+            success, value = _get_persistent_tag_group().GetTagAsBoolean(path)
         elif dm_type == "String":
-            success, value = DM.GetPersistentTagGroup().GetTagAsString(path)
+            success, value = _get_persistent_tag_group().GetTagAsString(path)
             value = DMScriptWrapper.unescapeNonAscii(value)
         else:
             raise ValueError("The datatype '{}' is not supported".format(var_type))
@@ -1419,28 +1808,25 @@ class DMScriptWrapper:
             The dm-code that defines this variable
         """
 
-        dmscript = []
         py_type = type(value)
-        dm_type = get_dm_type(py_type, for_taggroup=False)
 
-        if py_type in (dict, list, tuple):
-            dmscript += DMScriptWrapper._getTagGroupDMCodeForVariable(
+        if py_type is dict or py_type is list or py_type is tuple:
+            return "\n".join(DMScriptWrapper._getTagGroupDMCodeForVariable(
                 name, value, declare_type
-            )
-        else:
-            if isinstance(value, str):
-                value = "\"{}\"".format(escape_dm_string(value))
-            
-            if declare_type:
-                line = "{type} {var} = {val};"
-            else:
-                line = "{var} = {val};"
-            
-            dmscript.append(line.format(type=dm_type, 
-                                        var=escape_dm_variable(name), 
-                                        val=value))
+            ))
         
-        return "\n".join(dmscript)
+        # scalar values are expressed in one line, this raises a LookupError
+        # for types that cannot be converted
+        dm_type = get_dm_type(py_type, for_taggroup=False)
+
+        if isinstance(value, str):
+            value = "\"{}\"".format(escape_dm_string(value))
+        
+        if declare_type:
+            return "{} {} = {};".format(dm_type, escape_dm_variable(name), 
+                                        value)
+        else:
+            return "{} = {};".format(escape_dm_variable(name), value)
     
     @staticmethod
     def _getTagGroupDMCodeForVariable(name: str, 
@@ -1473,6 +1859,7 @@ class DMScriptWrapper:
         dmscript = []
         py_type = type(value)
         dm_type = get_dm_type(py_type, for_taggroup=False)
+        escaped_var = escape_dm_variable(prefix + name)
 
         # prepare creator function
         if py_type == dict:
@@ -1488,8 +1875,7 @@ class DMScriptWrapper:
         else:
             line = "{var} = {val};"
         
-        dmscript.append(line.format(type=dm_type, 
-                                    var=escape_dm_variable(prefix + name), 
+        dmscript.append(line.format(type=dm_type, var=escaped_var, 
                                     val=creator))
 
         index = None
@@ -1499,22 +1885,14 @@ class DMScriptWrapper:
             dmscript.append("number {};".format(index))
 
         for i, (key, value) in enumerate(iterator):
-            if value is None:
-                # fix none type
-                value_py_type = None
-                value_dm_type = "Number"
-                value = 0
-            else:
-                # get the type of the variable to express
-                value_py_type = type(value)
-                value_dm_type = get_dm_type(value_py_type, for_taggroup=True)
+            value_py_type = type(value)
+            value_code = _taggroup_value_dm_code.get(value_py_type)
 
-            if value_py_type == str:
-                # add quotes to str values
-                value = "\"{}\"".format(escape_dm_string(value))
-            elif value_py_type == bool:
-                value = int(value)
+            if value_code is not None:
+                value_dm_type, value_converter = value_code
+                value = value_converter(value)
             elif value_py_type in (dict, list, tuple):
+                value_dm_type = get_dm_type(value_py_type, for_taggroup=True)
                 # current value is a TagGroup or TagList, recursively create 
                 # the TagGroup or the TagList and then add it 
                 dmscript.append("")
@@ -1529,22 +1907,23 @@ class DMScriptWrapper:
                 # rewrite the value to the variable name of the TagGroup or 
                 # TagList that now exists
                 value = p + n
+            else:
+                # raises the LookupError for unsupported types
+                value_dm_type = get_dm_type(value_py_type, for_taggroup=True)
 
             if py_type in (list, tuple):
                 # add the next index to the list
                 dmscript.append("{}.TagGroupInsertTagAs{}(infinity(), {});".format(
-                    escape_dm_variable(prefix + name), value_dm_type, value
+                    escaped_var, value_dm_type, value
                 ))
             else:
                 # add the labeled tag and the value
                 dmscript += [
                     "{} = {}.TagGroupCreateNewLabeledTag(\"{}\");".format(
-                        index, escape_dm_variable(prefix + name), 
-                        escape_dm_string(key)
+                        index, escaped_var, escape_dm_string(key)
                     ),
                     "{}.TagGroupSetIndexedTagAs{}({}, {});".format(
-                        escape_dm_variable(prefix + name), value_dm_type, 
-                        index, value
+                        escaped_var, value_dm_type, index, value
                     )
                 ]
     
@@ -1557,201 +1936,17 @@ class DMScriptWrapper:
         save `TagGroup`s and `TagList`s as an 1d-"array" and escape non ascii
         values.
 
+        The code does not depend on any variable (the variable name is passed
+        as a dm-script parameter), so it is created once when the module is
+        imported.
+
         Returns
         -------
         str
             The dm script defining the functions
         """
 
-        return "\n".join(map(lambda x: x.replace(8 * " ", "", 1), 
-        """
-        string __exec_dmscript_escape_non_ascii(string str){
-            string escape;
-            number l = str.len();
-            number u = 0;
-            for(number i = 0; i < l; i++){
-                u = unc(str, i);
-                if(u > 126){
-                    // current character is a non-ascii character
-                    escape = "{{unc" + u + "}}";
-                    str = str.left(i) + escape + str.right(l - i - 1);
-                    i += escape.len() - 1;
-                    l += escape.len() - 1;
-                }
-            }
-            return str;
-        }
-
-        string __exec_dmscript_replace(string subject, string search, string replace){
-            if(subject.find(search) < 0){
-                return subject;
-            }
-
-            String r = "";
-            number l = search.len();
-            number pos;
-            while((pos = subject.find(search)) >= 0){
-                r.stringAppend(subject.left(pos) + replace);
-                subject = subject.right(subject.len() - pos - l);
-            }
-
-            return r;
-        }
-
-        void __exec_dmscript_linearizeTags(TagGroup &linearized, TagGroup tg, string var_name, string path){
-            path = __exec_dmscript_escape_non_ascii(path);
-
-            string available_paths = "";
-            if(linearized.TagGroupDoesTagExist("{{available-paths}}" + var_name)){
-                linearized.TagGroupGetTagAsString("{{available-paths}}" + var_name, available_paths);
-            }
-
-            if(tg.TagGroupIsValid()){
-                for(number i = 0; i < tg.TagGroupCountTags(); i++){
-                    String label;
-                    if(tg.TagGroupIsList()){
-                        label = i + "";
-                    }
-                    else{
-                        label = tg.TagGroupGetTagLabel(i).__exec_dmscript_replace("/", "//");
-                    }
-                    label = __exec_dmscript_escape_non_ascii(label);
-
-                    number type = tg.TagGroupGetTagType(i, 0);
-                    string type_name = "";
-                    number index;
-                    string p = path + "/" + label;
-
-                    if(type == 0 || type == 3){
-                        // TagGroup
-                        // There is a bug where TagGroups return 3 instead of 0,
-                        // this can simply be tested by converting to a
-                        // TagGroup, if the TagGroup is not valid, it is a long,
-                        // otherwise the TagGroup
-                        TagGroup value;
-                
-                        // save the available paths for the next function call
-                        if(!linearized.TagGroupDoesTagExist("{{available-paths}}" + var_name)){
-                            number ind = linearized.TagGroupCreateNewLabeledTag("{{available-paths}}" + var_name);
-                            linearized.TagGroupSetIndexedTagAsString(ind, available_paths);
-                        }
-                        else{
-                            linearized.TagGroupSetTagAsString("{{available-paths}}" + var_name, available_paths);
-                        }
-                        
-                        tg.TagGroupGetIndexedTagAsTagGroup(i, value);
-
-                        if(type == 0 || value.TagGroupIsValid()){
-                            __exec_dmscript_linearizeTags(linearized, value, var_name, p);
-
-                            // there may have been added some paths
-                            if(linearized.TagGroupDoesTagExist("{{available-paths}}" + var_name)){
-                                linearized.TagGroupGetTagAsString("{{available-paths}}" + var_name, available_paths);
-                            }
-                            
-                            if(value.TagGroupIsList()){
-                                type_name = "TagList";
-                            }
-                            else{
-                                type_name = "TagGroup";
-                            }
-                        }
-                    }
-
-                    if(type_name == ""){
-                        if(type == 2){
-                            // tag is a short
-                            number value
-
-                            tg.TagGroupGetIndexedTagAsShort(i, value)
-                            index = linearized.TagGroupCreateNewLabeledTag(p);
-                            linearized.TagGroupSetIndexedTagAsShort(index, value);
-                            type_name = "Short";
-                        }
-                        else if(type == 3){
-                            // tag is a long
-                            number value
-
-                            tg.TagGroupGetIndexedTagAsLong(i, value)
-                            index = linearized.TagGroupCreateNewLabeledTag(p);
-                            linearized.TagGroupSetIndexedTagAsLong(index, value);
-                            type_name = "Long";
-                        }
-                        else if(type == 4){
-                            number value;
-                            
-                            tg.TagGroupGetIndexedTagAsUInt16(index, value);
-                            index = linearized.TagGroupCreateNewLabeledTag(p);
-                            linearized.TagGroupSetIndexedTagAsUInt16(index, value);
-                            type_name = "UInt16";
-                        }
-                        else if(type == 5){
-                            number value;
-                            
-                            tg.TagGroupGetIndexedTagAsUInt32(index, value);
-                            index = linearized.TagGroupCreateNewLabeledTag(p);
-                            linearized.TagGroupSetIndexedTagAsUInt32(index, value);
-                            type_name = "UInt32";
-                        }
-                        else if(type == 6){
-                            // tag is a float
-                            number value
-
-                            tg.TagGroupGetIndexedTagAsFloat(i, value)
-                            index = linearized.TagGroupCreateNewLabeledTag(p);
-                            linearized.TagGroupSetIndexedTagAsFloat(index, value);
-                            type_name = "Float";
-                        }
-                        else if(type == 7){
-                            // tag is a double
-                            number value
-
-                            tg.TagGroupGetIndexedTagAsDouble(i, value)
-                            index = linearized.TagGroupCreateNewLabeledTag(p);
-                            linearized.TagGroupSetIndexedTagAsDouble(index, value);
-                            type_name = "Double";
-                        }
-                        else if(type == 8){
-                            // tag is a boolean
-                            number value
-
-                            tg.TagGroupGetIndexedTagAsBoolean(i, value)
-                            index = linearized.TagGroupCreateNewLabeledTag(p);
-                            linearized.TagGroupSetIndexedTagAsBoolean(index, value);
-                            type_name = "Boolean";
-                        }
-                        // skip type=15, this is more complicated types like rgbnumber, 
-                        // shortpoint, longpoint, floatcomplex, doublecomplex, and
-                        // shortrect, longrect and float rect
-                        else if(type == 20){
-                            // tag is a string
-                            string value
-
-                            tg.TagGroupGetIndexedTagAsString(i, value)
-                            index = linearized.TagGroupCreateNewLabeledTag(p);
-                            linearized.TagGroupSetIndexedTagAsString(index, __exec_dmscript_escape_non_ascii(value));
-                            type_name = "String";
-                        }
-                    }
-                    
-                    if(type_name != ""){
-                        index = linearized.TagGroupCreateNewLabeledTag("{{type}}" + p);
-                        linearized.TagGroupSetIndexedTagAsString(index, type_name);
-
-                        available_paths += p + ";";
-                    }
-                }
-                
-                if(!linearized.TagGroupDoesTagExist("{{available-paths}}" + var_name)){
-                    number ind = linearized.TagGroupCreateNewLabeledTag("{{available-paths}}" + var_name);
-                    linearized.TagGroupSetIndexedTagAsString(ind, available_paths);
-                }
-                else{
-                    linearized.TagGroupSetTagAsString("{{available-paths}}" + var_name, available_paths);
-                }
-            }
-        }
-        """.split("\n")))
+        return _execdmscript_lib_functions
     
     @staticmethod
     def unescapeNonAscii(escaped: str, 
@@ -1788,24 +1983,33 @@ class DMScriptWrapper:
             The `escaped` with unescaped unicode sequences, if no sequence is 
             found, the `escaped` is returned untouched
         """
-        for match in DMScriptWrapper._unescape_chars_reg.finditer(escaped):
-            codes = []
-            for m in DMScriptWrapper._unescape_char_reg.finditer(match.group(0)):
-                codes.append(int(m.group(1)))
+        if "{{unc" not in escaped:
+            # most strings are ascii only, skip the regular expression
+            return escaped
+
+        # bind the method once instead of looking it up for every match
+        find_codes = DMScriptWrapper._unescape_char_reg.findall
+
+        # decide how to decode once, not for every match
+        if encoding is None:
+            def unescape(match):
+                return "".join(map(chr, map(int, find_codes(match.group(0)))))
+        else:
+            # look up the codec once, bytes.decode() looks it up on each call
+            decode = codecs.getdecoder(encoding)
+
+            def unescape(match):
+                codes = list(map(int, find_codes(match.group(0))))
 
-            if encoding is None:
-                unescaped = "".join(map(chr, codes))
-            else:
                 try:
-                    unescaped = bytes(codes).decode(encoding)
+                    return decode(bytes(codes))[0]
                 except Exception as e:
                     print("To escape string:", escaped, "bytes:", codes)
                     raise e
-                
-            # replace() is faster than using slices
-            escaped = escaped.replace(match.group(0), unescaped, 1)
         
-        return escaped
+        # replace all sequences in one pass instead of searching each of them
+        # in the whole string again
+        return DMScriptWrapper._unescape_chars_reg.sub(unescape, escaped)
 
     @staticmethod
     def normalizeScripts(scripts: typing.Sequence) -> typing.List[tuple]:
@@ -1821,20 +2025,42 @@ class DMScriptWrapper:
         -------
         list of tuple
             A list containing a tuple in each entry, each tuple contains 'file'
-            or 'script' at index 0 and the path or the script at index 1
+            or 'script' at index 0 and the path or the script at index 1, the
+            kind is always lower case
         """
 
-        normalized = []
+        return [n for n in map(DMScriptWrapper._normalizeScript, scripts) 
+                if n is not None]
 
-        for script in scripts:
-            if isinstance(script, (list, tuple)) and len(script) >= 2:
-                normalized.append(script)
-            elif isinstance(script, pathlib.PurePath):
-                normalized.append(("file", script))
-            elif isinstance(script, str) and script != "":
-                if os.path.isfile(script):
-                    normalized.append(("file", script))
-                else:
-                    normalized.append(("script", script))
+    @staticmethod
+    def _normalizeScript(script: typing.Any) -> typing.Union[tuple, None]:
+        """Create the tuple for one script for 
+        `DMScriptWrapper.normalizeScripts()`.
 
-        return normalized
\ No newline at end of file
+        Parameters
+        ----------
+        script : string, pathlib.PurePath or tuple
+            The script
+        
+        Returns
+        -------
+        tuple or None
+            The tuple containing 'file' or 'script' at index 0 and the path or
+            the script at index 1 or None if the `script` is not valid
+        """
+        if isinstance(script, (list, tuple)) and len(script) >= 2:
+            kind = script[0]
+            if isinstance(kind, str):
+                kind = kind.lower()
+            return (kind, script[1])
+        elif isinstance(script, pathlib.PurePath):
+            return ("file", script)
+        elif isinstance(script, str) and script != "":
+            # a path cannot contain a new line, only ask the file system for 
+            # single line strings
+            if "\n" not in script and os.path.isfile(script):
+                return ("file", script)
+            else:
+                return ("script", script)
+        
+        return None
\ No newline at end of file
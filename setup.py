@@ -1,8 +1,13 @@
+import os
 import setuptools
 
-with open("README.md", "r") as fh:
-    long_description = fh.read()
-with open("VERSION", "r") as fh:
+here = os.path.dirname(os.path.abspath(__file__))
+
+long_description = ""
+if os.path.isfile(os.path.join(here, "README.md")):
+    with open(os.path.join(here, "README.md"), "r", encoding="utf-8") as fh:
+        long_description = fh.read()
+with open(os.path.join(here, "VERSION"), "r", encoding="utf-8") as fh:
     version = fh.read()
 
 setuptools.setup(